@@ -0,0 +1,150 @@
+import asyncio
+import bisect
+import os
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, o processo único é sempre o líder
+    fcntl = None
+
+# Status que não passam mais por transições automáticas
+STATUS_ENCERRADOS = ("Cancelada", "Concluída")
+
+class AgendaDatas:
+    """Reservas ordenadas por data de check-in e de check-out.
+
+    As tarefas diárias retiram do início das listas apenas as reservas cujas
+    datas já passaram, então cada execução custa O(alterações). Reservas
+    canceladas ou excluídas não são removidas na hora: quem consome os ids
+    confere o status atual da reserva.
+    """
+
+    def __init__(self):
+        self.por_check_in = []   # (data_check_in, id)
+        self.por_check_out = []  # (data_check_out, id)
+
+    def reconstruir(self, reservas):
+        ativas = [r for r in reservas if r["status"] not in STATUS_ENCERRADOS]
+        self.por_check_in = sorted((r["data_check_in"], r["id"]) for r in ativas)
+        self.por_check_out = sorted((r["data_check_out"], r["id"]) for r in ativas)
+
+    def indexar(self, reserva):
+        if reserva["status"] in STATUS_ENCERRADOS:
+            return
+        self._inserir(self.por_check_in, (reserva["data_check_in"], reserva["id"]))
+        self._inserir(self.por_check_out, (reserva["data_check_out"], reserva["id"]))
+
+    def _inserir(self, lista, item):
+        i = bisect.bisect_left(lista, item)
+        if i == len(lista) or lista[i] != item:
+            lista.insert(i, item)
+
+    def _retirar_antes_de(self, lista, data):
+        fim = bisect.bisect_left(lista, (data,))
+        ids = [reserva_id for _, reserva_id in lista[:fim]]
+        del lista[:fim]
+        return ids
+
+    def _na_data(self, lista, data):
+        inicio = bisect.bisect_left(lista, (data,))
+        fim = bisect.bisect_left(lista, (data + "\x00",))
+        return [reserva_id for _, reserva_id in lista[inicio:fim]]
+
+    def retirar_check_outs_antes_de(self, data):
+        return self._retirar_antes_de(self.por_check_out, data)
+
+    def retirar_check_ins_antes_de(self, data):
+        return self._retirar_antes_de(self.por_check_in, data)
+
+    def chegadas(self, data):
+        return self._na_data(self.por_check_in, data)
+
+    def saidas(self, data):
+        return self._na_data(self.por_check_out, data)
+
+class Agendador:
+    """Executa tarefas diárias em segundo plano dentro do processo da API.
+
+    Com vários workers, apenas o que obtiver o lock do arquivo executa as
+    tarefas; os demais tentam assumir a liderança periodicamente, caso o
+    líder seja encerrado.
+    """
+
+    def __init__(self, arquivo_lock, intervalo_lideranca=60):
+        self.arquivo_lock = arquivo_lock
+        self.intervalo_lideranca = intervalo_lideranca
+        self.tarefas = {}
+        self.ultimas_execucoes = {}
+        self._lock_fd = None
+
+    def diaria(self, nome, horario):
+        """Registra uma função para rodar todo dia no horário (datetime.time) informado."""
+        def registrar(funcao):
+            self.tarefas[nome] = (horario, funcao)
+            return funcao
+        return registrar
+
+    def lider(self):
+        return self._lock_fd is not None
+
+    def adquirir_lideranca(self):
+        if self._lock_fd is not None:
+            return True
+        if fcntl is None:
+            self._lock_fd = -1
+            return True
+
+        fd = os.open(self.arquivo_lock, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def liberar_lideranca(self):
+        if self._lock_fd is not None and self._lock_fd >= 0:
+            os.close(self._lock_fd)
+        self._lock_fd = None
+
+    def proxima_execucao(self, horario, agora):
+        proxima = datetime.combine(agora.date(), horario)
+        if proxima <= agora:
+            proxima += timedelta(days=1)
+        return proxima
+
+    async def executar_tarefa(self, nome):
+        _, funcao = self.tarefas[nome]
+        inicio = datetime.now()
+        try:
+            resultado = await asyncio.to_thread(funcao)
+            self.ultimas_execucoes[nome] = {"inicio": inicio.isoformat(), "status": "ok", "resultado": resultado}
+        except Exception as e:
+            print(f"⚠️ Erro na tarefa {nome}: {e}")
+            self.ultimas_execucoes[nome] = {"inicio": inicio.isoformat(), "status": "erro", "erro": str(e)}
+        return self.ultimas_execucoes[nome]
+
+    async def executar(self):
+        while not self.adquirir_lideranca():
+            await asyncio.sleep(self.intervalo_lideranca)
+
+        try:
+            # Ao assumir a liderança, recuperar execuções perdidas (tarefas são idempotentes)
+            for nome in self.tarefas:
+                await self.executar_tarefa(nome)
+
+            while True:
+                agora = datetime.now()
+                proximas = {nome: self.proxima_execucao(horario, agora) for nome, (horario, _) in self.tarefas.items()}
+                if not proximas:
+                    return
+                momento = min(proximas.values())
+                await asyncio.sleep((momento - agora).total_seconds())
+
+                for nome, proxima in proximas.items():
+                    if proxima == momento:
+                        await self.executar_tarefa(nome)
+        finally:
+            self.liberar_lideranca()
@@ -0,0 +1,300 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele os snapshots usam gzip
+    zstandard = None
+
+# Coleções guardadas registro a registro, com a chave que identifica cada item
+CHAVES_COLECOES = {
+    "clientes": "id",
+    "quartos": "numero",
+    "reservas": "id",
+}
+
+# Funções de arquivo
+def salvar_json_atomico(caminho, data):
+    """Grava em um arquivo temporário e troca pelo definitivo com os.replace.
+
+    Leitores nunca veem um arquivo pela metade: ou o conteúdo antigo, ou o novo.
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    # mkstemp cria com 0600; manter as permissões do arquivo existente
+    try:
+        modo = stat.S_IMODE(os.stat(caminho).st_mode)
+    except FileNotFoundError:
+        modo = 0o644
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix=".tmp-", suffix=".json")
+    try:
+        os.chmod(temporario, modo)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def comprimir(conteudo):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor().compress(conteudo), ".json.zst"
+    return gzip.compress(conteudo), ".json.gz"
+
+def descomprimir(caminho):
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    if caminho.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Instale o pacote zstandard para ler {caminho}")
+        return zstandard.ZstdDecompressor().decompress(conteudo)
+    return gzip.decompress(conteudo)
+
+def chaves_registros(registros, chave):
+    """Pares (chave, registro) de uma coleção.
+
+    Dados antigos podem ter chaves repetidas (ids gerados com len+1 após uma
+    exclusão); as repetições recebem a ordem de ocorrência: "3", "3#2", ...
+    """
+    vistos = {}
+    for r in registros:
+        k = str(r[chave])
+        n = vistos[k] = vistos.get(k, 0) + 1
+        yield (k if n == 1 else f"{k}#{n}"), r
+
+def hash_registro(registro):
+    return hashlib.blake2b(json.dumps(registro, sort_keys=True, ensure_ascii=False).encode("utf-8"), digest_size=16).digest()
+
+class GerenciadorBackup:
+    """Snapshots comprimidos e incrementais do arquivo de dados.
+
+    Cada cadeia começa com um snapshot completo, seguido de snapshots
+    incrementais que guardam apenas os registros alterados e as chaves
+    removidas desde o anterior. Para restaurar um instante, aplica-se o
+    último completo até ele e os incrementais seguintes.
+    """
+
+    def __init__(self, data_file, diretorio, completo_a_cada=24, manter_completos=7):
+        self.data_file = data_file
+        self.diretorio = diretorio
+        self.completo_a_cada = completo_a_cada
+        self.manter_completos = manter_completos
+        self.hashes = None          # estado do último snapshot: {colecao: {chave: hash}}
+        self.incrementais = 0       # incrementais desde o último completo
+        self.ultima_versao = None   # (inode, mtime, tamanho) do arquivo no último snapshot
+        self.lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    # ---------- criação ----------
+
+    def calcular_hashes(self, data):
+        hashes = {}
+        for colecao, chave in CHAVES_COLECOES.items():
+            hashes[colecao] = {k: hash_registro(r) for k, r in chaves_registros(data.get(colecao, []), chave)}
+        hashes["_outros"] = {k: hash_registro(v) for k, v in data.items() if k not in CHAVES_COLECOES}
+        return hashes
+
+    def calcular_incremento(self, data, hashes):
+        incremento = {}
+        for colecao, chave in CHAVES_COLECOES.items():
+            anteriores = self.hashes.get(colecao, {})
+            atuais = hashes[colecao]
+            alterados = {k: r for k, r in chaves_registros(data.get(colecao, []), chave) if anteriores.get(k) != atuais[k]}
+            removidos = [k for k in anteriores if k not in atuais]
+            if alterados or removidos:
+                incremento[colecao] = {"alterados": alterados, "removidos": removidos}
+
+        anteriores = self.hashes.get("_outros", {})
+        outros = {k: data[k] for k, h in hashes["_outros"].items() if anteriores.get(k) != h}
+        outros_removidos = [k for k in anteriores if k not in hashes["_outros"]]
+        return incremento, outros, outros_removidos
+
+    def gravar(self, conteudo, tipo, criado_em):
+        os.makedirs(self.diretorio, exist_ok=True)
+        dados, extensao = comprimir(json.dumps(conteudo, ensure_ascii=False).encode("utf-8"))
+        nome = f"{criado_em:%Y%m%dT%H%M%S%f}-{tipo}{extensao}"
+        caminho = os.path.join(self.diretorio, nome)
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+        return caminho
+
+    def carregar_estado(self):
+        """Continua a cadeia existente no diretório após reiniciar o processo."""
+        snapshots = self.listar()
+        completos = [i for i, s in enumerate(snapshots) if s["tipo"] == "completo"]
+        if not completos:
+            return
+        data = self.restaurar()
+        self.hashes = self.calcular_hashes(data)
+        self.incrementais = len(snapshots) - completos[-1] - 1
+
+    def snapshot(self, forcar_completo=False):
+        """Cria um snapshot se o arquivo mudou. Retorna o caminho criado ou None."""
+        with self.lock:
+            try:
+                info = os.stat(self.data_file)
+            except FileNotFoundError:
+                return None
+            versao = (info.st_ino, info.st_mtime_ns, info.st_size)
+            if versao == self.ultima_versao and not forcar_completo:
+                return None
+
+            if self.hashes is None and not forcar_completo:
+                self.carregar_estado()
+
+            with open(self.data_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            criado_em = datetime.now()
+            hashes = self.calcular_hashes(data)
+
+            if forcar_completo or self.hashes is None or self.incrementais >= self.completo_a_cada:
+                caminho = self.gravar({"tipo": "completo", "criado_em": criado_em.isoformat(), "dados": data}, "completo", criado_em)
+                self.incrementais = 0
+                self.remover_antigos()
+            else:
+                colecoes, outros, outros_removidos = self.calcular_incremento(data, hashes)
+                caminho = None
+                if colecoes or outros or outros_removidos:
+                    caminho = self.gravar({
+                        "tipo": "incremental",
+                        "criado_em": criado_em.isoformat(),
+                        "colecoes": colecoes,
+                        "outros": outros,
+                        "outros_removidos": outros_removidos
+                    }, "incremental", criado_em)
+                    self.incrementais += 1
+
+            self.hashes = hashes
+            self.ultima_versao = versao
+            return caminho
+
+    def remover_antigos(self):
+        completos = [s for s in self.listar() if s["tipo"] == "completo"]
+        if len(completos) <= self.manter_completos:
+            return
+        limite = completos[-self.manter_completos]["criado_em"]
+        for s in self.listar():
+            if s["criado_em"] < limite:
+                os.remove(s["caminho"])
+
+    # ---------- consulta e restauração ----------
+
+    def listar(self):
+        if not os.path.isdir(self.diretorio):
+            return []
+        snapshots = []
+        for nome in sorted(os.listdir(self.diretorio)):
+            if nome.endswith(".tmp") or "-" not in nome:
+                continue
+            carimbo, resto = nome.split("-", 1)
+            try:
+                criado_em = datetime.strptime(carimbo, "%Y%m%dT%H%M%S%f")
+            except ValueError:
+                continue
+            snapshots.append({
+                "criado_em": criado_em,
+                "tipo": resto.split(".", 1)[0],
+                "caminho": os.path.join(self.diretorio, nome)
+            })
+        return snapshots
+
+    def restaurar(self, ate=None):
+        """Reconstrói os dados como estavam no instante `ate` (padrão: o mais recente)."""
+        snapshots = [s for s in self.listar() if ate is None or s["criado_em"] <= ate]
+        inicio = max((i for i, s in enumerate(snapshots) if s["tipo"] == "completo"), default=None)
+        if inicio is None:
+            return None
+
+        data = json.loads(descomprimir(snapshots[inicio]["caminho"]))["dados"]
+        for s in snapshots[inicio + 1:]:
+            incremento = json.loads(descomprimir(s["caminho"]))
+            for colecao, mudancas in incremento["colecoes"].items():
+                chave = CHAVES_COLECOES[colecao]
+                removidos = set(mudancas["removidos"])
+                alterados = mudancas["alterados"]
+                if isinstance(alterados, list):  # formato anterior, sem chaves repetidas
+                    alterados = {str(r[chave]): r for r in alterados}
+                registros = []
+                for k, r in chaves_registros(data.get(colecao, []), chave):
+                    if k in removidos:
+                        continue
+                    registros.append(alterados.pop(k, r))
+                registros.extend(alterados.values())
+                data[colecao] = registros
+            data.update(incremento["outros"])
+            for k in incremento["outros_removidos"]:
+                data.pop(k, None)
+        return data
+
+    # ---------- execução em segundo plano ----------
+
+    def iniciar(self, intervalo, deve_executar=lambda: True):
+        """Inicia a thread que tira snapshots a cada `intervalo` segundos."""
+        def executar():
+            while not self._parar.wait(intervalo):
+                if not deve_executar():
+                    continue
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    print(f"⚠️ Erro ao criar backup: {e}")
+
+        self._parar.clear()
+        self._thread = threading.Thread(target=executar, name="backup", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Backups do Infinity Hotel")
+    parser.add_argument("--dados", default="hotel_data.json", help="Arquivo de dados da API")
+    parser.add_argument("--diretorio", default="backups", help="Diretório dos snapshots")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    comandos.add_parser("listar", help="Lista os snapshots disponíveis")
+    comandos.add_parser("snapshot", help="Cria um snapshot completo agora")
+    restaurar = comandos.add_parser("restaurar", help="Restaura os dados de um instante")
+    restaurar.add_argument("ate", nargs="?", help="Data/hora ISO (ex.: 2025-06-05T15:00). Padrão: mais recente")
+    restaurar.add_argument("--saida", help="Arquivo de saída (padrão: <dados>.restaurado.json)")
+    restaurar.add_argument("--aplicar", action="store_true", help="Substitui o arquivo de dados (pare o servidor antes)")
+
+    args = parser.parse_args()
+    gerenciador = GerenciadorBackup(args.dados, args.diretorio)
+
+    if args.comando == "listar":
+        for s in gerenciador.listar():
+            print(f"{s['criado_em'].isoformat()}  {s['tipo']:<12} {s['caminho']}")
+    elif args.comando == "snapshot":
+        print(f"✅ Snapshot criado: {gerenciador.snapshot(forcar_completo=True)}")
+    elif args.comando == "restaurar":
+        ate = datetime.fromisoformat(args.ate) if args.ate else None
+        data = gerenciador.restaurar(ate)
+        if data is None:
+            print("❌ Nenhum snapshot completo encontrado até a data informada")
+            sys.exit(1)
+        if args.aplicar:
+            destino = args.dados
+        else:
+            destino = args.saida or os.path.splitext(args.dados)[0] + ".restaurado.json"
+        salvar_json_atomico(destino, data)
+        print(f"✅ Dados restaurados em {destino}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Gerador de carga simples para comparar formas de iniciar o servidor.
+# Uso: python benchmark.py --url http://localhost:8000/api/public/quartos-disponiveis
+import argparse
+import http.client
+import multiprocessing
+import time
+from urllib.parse import urlparse
+
+def cliente(url, duracao, conexoes, fila):
+    alvo = urlparse(url)
+    caminho = alvo.path or "/"
+    if alvo.query:
+        caminho += "?" + alvo.query
+
+    latencias = []
+    erros = 0
+    abertas = [http.client.HTTPConnection(alvo.hostname, alvo.port or 80, timeout=10) for _ in range(conexoes)]
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        for i, conexao in enumerate(abertas):
+            inicio = time.perf_counter()
+            try:
+                conexao.request("GET", caminho)
+                resposta = conexao.getresponse()
+                resposta.read()
+                if resposta.status != 200:
+                    erros += 1
+            except (OSError, http.client.HTTPException):
+                erros += 1
+                conexao.close()
+                abertas[i] = http.client.HTTPConnection(alvo.hostname, alvo.port or 80, timeout=10)
+                continue
+            latencias.append(time.perf_counter() - inicio)
+    fila.put((latencias, erros))
+
+def executar():
+    parser = argparse.ArgumentParser(description="Mede requisições por segundo de um endpoint")
+    parser.add_argument("--url", default="http://localhost:8000/api/public/quartos-disponiveis")
+    parser.add_argument("--duracao", type=float, default=10, help="Segundos de carga")
+    parser.add_argument("--processos", type=int, default=4, help="Processos geradores de carga")
+    parser.add_argument("--conexoes", type=int, default=4, help="Conexões keep-alive por processo")
+    args = parser.parse_args()
+
+    fila = multiprocessing.Queue()
+    processos = [
+        multiprocessing.Process(target=cliente, args=(args.url, args.duracao, args.conexoes, fila))
+        for _ in range(args.processos)
+    ]
+    for p in processos:
+        p.start()
+    resultados = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+
+    latencias = sorted(l for parcial, _ in resultados for l in parcial)
+    erros = sum(e for _, e in resultados)
+    if not latencias:
+        print(f"❌ Nenhuma requisição concluída ({erros} erros)")
+        return
+
+    def percentil(p):
+        return latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000
+
+    print(f"Requisições: {len(latencias)} em {args.duracao:.0f}s ({len(latencias) / args.duracao:.0f} req/s), erros: {erros}")
+    print(f"Latência: p50 {percentil(0.5):.2f}ms, p99 {percentil(0.99):.2f}ms")
+
+if __name__ == "__main__":
+    executar()
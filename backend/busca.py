@@ -0,0 +1,192 @@
+import bisect
+import heapq
+import re
+import unicodedata
+
+from backup import chaves_registros
+
+# Funções de normalização
+def normalizar_texto(texto):
+    """Remove acentos e converte para minúsculas ("José" -> "jose")."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(ch for ch in texto if not unicodedata.combining(ch))
+    return texto.lower()
+
+def tokenizar(texto):
+    return re.findall(r"[a-z0-9]+", normalizar_texto(texto))
+
+# Consulta formada só por dígitos e pontuação de telefone, como "(31) 99999-8888"
+TELEFONE_CONSULTA = re.compile(r"[\d\s()+.-]+")
+
+def termos_telefone(telefone):
+    # Número completo, sem DDD e só o final, para buscas como "3199...", "9999..." ou "8888"
+    digitos = re.sub(r"\D", "", str(telefone or ""))
+    if not digitos:
+        return set()
+    return {digitos, digitos[2:], digitos[-4:]} - {""}
+
+def termos_cliente(cliente):
+    termos = set(tokenizar(cliente.get("nome", "")))
+    termos.update(tokenizar(cliente.get("email", "")))
+    termos.update(termos_telefone(cliente.get("telefone", "")))
+    return termos
+
+def consulta_cliente(consulta):
+    # Telefones digitados com formatação viram um único prefixo de dígitos
+    if TELEFONE_CONSULTA.fullmatch(consulta.strip()):
+        digitos = re.sub(r"\D", "", consulta)
+        if len(digitos) >= 4:
+            return [digitos]
+    return tokenizar(consulta)
+
+def termo_exato(campo, valor):
+    # Consultas só geram termos [a-z0-9], então um termo iniciado por ":"
+    # nunca casa por prefixo; é usado apenas como filtro exato
+    return f":{campo}:{valor}"
+
+def termos_reserva(reserva):
+    termos = set(tokenizar(reserva.get("cliente_nome", "")))
+    termos.update(tokenizar(reserva.get("quarto_tipo", "")))
+    termos.update(tokenizar(reserva.get("status", "")))
+    termos.add(str(reserva["id"]))
+    termos.add(normalizar_texto(reserva.get("quarto_numero", "")))
+    termos.add(termo_exato("status", reserva.get("status", "")))
+    return termos - {""}
+
+def ordem_chave(chave):
+    # Ids numéricos em ordem natural ("2" antes de "10"); ids repetidos
+    # ("3", "3#2") na ordem em que aparecem nos dados
+    doc_id, _, n = chave.partition("#")
+    return (len(doc_id), doc_id, int(n or 1))
+
+class IndiceBusca:
+    """Índice invertido em memória com busca por prefixo.
+
+    Os termos ficam numa lista ordenada, então todos os termos que começam
+    com um prefixo formam um intervalo contíguo encontrado com bisect.
+    Registros com id repetido recebem chaves próprias ("3", "3#2"), como
+    nos backups.
+    """
+
+    def __init__(self, extrair_termos, tokenizar_consulta=tokenizar):
+        self.extrair_termos = extrair_termos
+        self.tokenizar_consulta = tokenizar_consulta
+        self.documentos = {}   # chave -> registro
+        self.termos_doc = {}   # chave -> termos indexados do registro
+        self.postings = {}     # termo -> chaves que contêm o termo
+        self.termos = []       # termos em ordem alfabética
+        self.ordem = []        # (ordem_chave, chave) de todos os registros, já ordenados
+
+    def reconstruir(self, registros):
+        self.documentos = {}
+        self.termos_doc = {}
+        self.postings = {}
+        for doc_id, registro in chaves_registros(registros, "id"):
+            termos = self.extrair_termos(registro)
+            self.documentos[doc_id] = dict(registro)
+            self.termos_doc[doc_id] = termos
+            for termo in termos:
+                self.postings.setdefault(termo, set()).add(doc_id)
+        self.termos = sorted(self.postings)
+        self.ordem = sorted((ordem_chave(doc_id), doc_id) for doc_id in self.documentos)
+
+    def indexar(self, doc_id, registro):
+        self.remover(doc_id)
+        termos = self.extrair_termos(registro)
+        self.documentos[doc_id] = dict(registro)
+        self.termos_doc[doc_id] = termos
+        bisect.insort(self.ordem, (ordem_chave(doc_id), doc_id))
+        for termo in termos:
+            if termo not in self.postings:
+                self.postings[termo] = set()
+                bisect.insort(self.termos, termo)
+            self.postings[termo].add(doc_id)
+
+    def sincronizar(self, registros):
+        """Atualiza o índice para `registros` reindexando só o que mudou.
+
+        Comparar os registros custa bem menos que tokenizar e ordenar todos os
+        termos de novo. A comparação é feita com cópias guardadas ao indexar
+        (os registros só têm valores simples), para que alterações feitas
+        depois no mesmo objeto ainda sejam detectadas. Retorna os registros
+        novos ou alterados.
+        """
+        atuais = dict(chaves_registros(registros, "id"))
+        for doc_id in [d for d in self.documentos if d not in atuais]:
+            self.remover(doc_id)
+        alterados = [(doc_id, r) for doc_id, r in atuais.items() if self.documentos.get(doc_id) != r]
+        for doc_id, registro in alterados:
+            self.indexar(doc_id, registro)
+        return [r for _, r in alterados]
+
+    def remover(self, doc_id):
+        if self.documentos.pop(doc_id, None) is not None:
+            item = (ordem_chave(doc_id), doc_id)
+            i = bisect.bisect_left(self.ordem, item)
+            if i < len(self.ordem) and self.ordem[i] == item:
+                del self.ordem[i]
+        for termo in self.termos_doc.pop(doc_id, ()):
+            ids = self.postings.get(termo)
+            if ids is None:
+                continue
+            ids.discard(doc_id)
+            if not ids:
+                del self.postings[termo]
+                i = bisect.bisect_left(self.termos, termo)
+                if i < len(self.termos) and self.termos[i] == termo:
+                    del self.termos[i]
+
+    def _ids_com_prefixo(self, prefixo):
+        ids = set()
+        i = bisect.bisect_left(self.termos, prefixo)
+        while i < len(self.termos) and self.termos[i].startswith(prefixo):
+            ids |= self.postings[self.termos[i]]
+            i += 1
+        return ids
+
+    def _primeiras_chaves(self, ids, quantidade):
+        if quantidade is None:
+            return sorted(ids, key=ordem_chave)
+        # Percorrer a ordem global custa cerca de quantidade * len(ordem) / len(ids)
+        # passos até completar a página; escolher os menores custa len(ids)
+        if quantidade * len(self.ordem) < len(ids) * len(ids):
+            chaves = []
+            for _, doc_id in self.ordem:
+                if doc_id in ids:
+                    chaves.append(doc_id)
+                    if len(chaves) == quantidade:
+                        break
+            return chaves
+        return heapq.nsmallest(quantidade, ids, key=ordem_chave)
+
+    def buscar_pagina(self, consulta, inicio=0, limite=None, exatos=()):
+        """Retorna (total, registros da página) que têm todos os termos da
+        consulta como prefixo e todos os `exatos` (ver termo_exato).
+
+        Só os registros da página são ordenados e montados; o total vem do
+        tamanho do conjunto de chaves encontradas.
+        """
+        ids = None
+        for termo in exatos:
+            encontrados = self.postings.get(termo, set())
+            ids = set(encontrados) if ids is None else ids & encontrados
+
+        # Começar pelo prefixo mais longo, que costuma ser o mais seletivo
+        for prefixo in sorted(self.tokenizar_consulta(consulta), key=len, reverse=True):
+            if ids is not None and not ids:
+                break
+            encontrados = self._ids_com_prefixo(prefixo)
+            ids = encontrados if ids is None else ids & encontrados
+
+        fim = None if limite is None else inicio + limite
+        if ids is None:
+            total = len(self.ordem)
+            chaves = [doc_id for _, doc_id in self.ordem[inicio:fim]]
+        else:
+            total = len(ids)
+            chaves = self._primeiras_chaves(ids, fim)[inicio:]
+        return total, [self.documentos[doc_id] for doc_id in chaves]
+
+    def buscar(self, consulta):
+        """Retorna todos os registros que têm os termos da consulta como prefixo."""
+        return self.buscar_pagina(consulta)[1]
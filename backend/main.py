@@ -1,22 +1,62 @@
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from datetime import datetime, timedelta
+from fastapi.responses import PlainTextResponse
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta, time
+import asyncio
+import heapq
 import json
 import os
 import re
+import threading
 import uvicorn
 import jwt
 from typing import Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, apenas threads do mesmo processo são serializadas
+    fcntl = None
+from busca import IndiceBusca, consulta_cliente, termo_exato, termos_cliente, termos_reserva
+from agendador import AgendaDatas, Agendador, STATUS_ENCERRADOS
+from backup import GerenciadorBackup, salvar_json_atomico
+from rastreamento import MiddlewareRastreamento, RotaRastreada, amostrar_pilhas, medir, span
+
 # Arquivo JSON para armazenar dados
 DATA_FILE = "hotel_data.json"
+DATA_LOCK_FILE = "hotel_data.json.lock"
+
+# Lock que elege o worker responsável pelas tarefas agendadas
+AGENDADOR_LOCK_FILE = "agendador.lock"
+
+# Snapshots comprimidos do arquivo de dados
+BACKUP_DIR = "backups"
+INTERVALO_BACKUP = 300  # segundos entre verificações de alteração
+
+# Rastreamento de requisições lentas (opcional): HOTEL_RASTREAMENTO=1
+RASTREAMENTO_ATIVO = os.environ.get("HOTEL_RASTREAMENTO") == "1"
+LIMITE_REQUISICAO_LENTA_MS = float(os.environ.get("HOTEL_LIMITE_LENTA_MS", "200"))
+PROFILER_MAX_SEGUNDOS = 30
 
 # Configurações de autenticação
 SECRET_KEY = "infinity_hotel_secret_key_2024"
 ALGORITHM = "HS256"
 ADMIN_PASSWORD = "admin123"  # Em produção, use hash
 
+# Configurações de bloqueio temporário (hold) durante o pagamento
+BLOQUEIO_MINUTOS = 15
+INTERVALO_VARREDURA = 30  # segundos máximos entre varreduras de bloqueios
+
+# Horários das tarefas diárias
+HORARIO_ENCERRAMENTO_ESTADIAS = time(3, 0)
+HORARIO_RELATORIOS = time(3, 30)
+
+# Paginação da busca administrativa
+BUSCA_POR_PAGINA = 20
+BUSCA_MAX_POR_PAGINA = 100
+
 # Estrutura padrão dos dados
 DEFAULT_DATA = {
     "clientes": [],
@@ -29,7 +69,36 @@ DEFAULT_DATA = {
     }
 }
 
+backups = GerenciadorBackup(DATA_FILE, BACKUP_DIR)
+
+# Trava de escrita: rotas e tarefas fazem leitura-alteração-gravação do
+# arquivo inteiro, então duas delas ao mesmo tempo perderiam uma das alterações
+dados_lock = threading.RLock()
+dados_lock_fd = None
+dados_lock_nivel = 0
+
+@contextmanager
+def transacao():
+    """Serializa alterações nos dados entre threads e entre workers.
+
+    Pode ser usada como `with transacao():` ou como decorador `@transacao()`.
+    """
+    global dados_lock_fd, dados_lock_nivel
+    with dados_lock:
+        if dados_lock_nivel == 0 and fcntl is not None:
+            dados_lock_fd = os.open(DATA_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(dados_lock_fd, fcntl.LOCK_EX)
+        dados_lock_nivel += 1
+        try:
+            yield
+        finally:
+            dados_lock_nivel -= 1
+            if dados_lock_nivel == 0 and dados_lock_fd is not None:
+                os.close(dados_lock_fd)
+                dados_lock_fd = None
+
 # Funções para manipular JSON
+@medir("load")
 def load_data():
     if not os.path.exists(DATA_FILE):
         save_data(DEFAULT_DATA)
@@ -38,13 +107,111 @@ def load_data():
     try:
         with open(DATA_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        save_data(DEFAULT_DATA)
-        return DEFAULT_DATA
+    except FileNotFoundError:
+        return load_data()
+    except json.JSONDecodeError:
+        return recuperar_dados()
 
+def recuperar_dados():
+    """Restaura o último backup quando o arquivo de dados está corrompido."""
+    with transacao():
+        # Outra requisição pode ter recuperado o arquivo enquanto esperávamos
+        try:
+            with open(DATA_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            pass
+        
+        data = backups.restaurar()
+        if data is None:
+            print(f"❌ {DATA_FILE} corrompido e nenhum backup disponível")
+            raise HTTPException(status_code=500, detail="Arquivo de dados corrompido e nenhum backup disponível")
+        
+        # Manter o arquivo corrompido para análise
+        corrompido = f"{DATA_FILE}.corrompido-{datetime.now():%Y%m%dT%H%M%S}"
+        os.replace(DATA_FILE, corrompido)
+        save_data(data)
+        print(f"⚠️ {DATA_FILE} corrompido (mantido em {corrompido}); dados restaurados do último backup")
+        return data
+
+@medir("persist")
 def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    salvar_json_atomico(DATA_FILE, data)
+    atualizar_indices(data, versao_dados())
+
+# ==================== ÍNDICES EM MEMÓRIA ====================
+# Atualizados por save_data a cada gravação, reindexando apenas os registros
+# que mudaram. Se o arquivo for alterado por outro worker (versão diferente),
+# a próxima consulta relê o arquivo e aplica a mesma comparação.
+indice_clientes = IndiceBusca(termos_cliente, consulta_cliente)
+indice_reservas = IndiceBusca(termos_reserva)
+agenda_reservas = AgendaDatas()
+indices_lock = threading.Lock()
+indices_versao = None
+
+def versao_dados():
+    # save_data troca o arquivo (novo inode) a cada gravação; o mtime sozinho
+    # pode se repetir em gravações muito próximas
+    try:
+        info = os.stat(DATA_FILE)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+def aplicar_alteracoes(data):
+    # A agenda só recebe reservas novas ou alteradas; as excluídas são
+    # descartadas por quem consome os ids
+    indice_clientes.sincronizar(data["clientes"])
+    for r in indice_reservas.sincronizar(data["reservas"]):
+        agenda_reservas.indexar(r)
+
+@medir("index")
+def sincronizar_indices():
+    global indices_versao
+    versao = versao_dados()
+    if versao is not None and versao == indices_versao:
+        return
+    
+    data = load_data()
+    with indices_lock:
+        if indices_versao is None:
+            indice_clientes.reconstruir(data["clientes"])
+            indice_reservas.reconstruir(data["reservas"])
+            agenda_reservas.reconstruir(data["reservas"])
+        else:
+            aplicar_alteracoes(data)
+        indices_versao = versao
+
+@medir("index")
+def atualizar_indices(data, versao):
+    global indices_versao
+    with indices_lock:
+        # Índices ainda não construídos serão montados na primeira busca
+        if indices_versao is None:
+            return
+        aplicar_alteracoes(data)
+        indices_versao = versao
+
+def paginar(indice, consulta, pagina, por_pagina, exatos=()):
+    if pagina < 1:
+        raise HTTPException(status_code=400, detail="Página deve ser maior ou igual a 1")
+    if por_pagina < 1 or por_pagina > BUSCA_MAX_POR_PAGINA:
+        raise HTTPException(status_code=400, detail=f"Itens por página deve estar entre 1 e {BUSCA_MAX_POR_PAGINA}")
+    
+    sincronizar_indices()
+    with indices_lock, span("index"):
+        total, resultados = indice.buscar_pagina(consulta, (pagina - 1) * por_pagina, por_pagina, exatos)
+    return {
+        "total": total,
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+        "resultados": resultados
+    }
+
+def proximo_id(registros):
+    # Maior id + 1: com len + 1, uma exclusão faria o próximo registro repetir um id
+    ids = [int(r["id"]) for r in registros if str(r["id"]).isdigit()]
+    return str(max(ids, default=0) + 1)
 
 # Funções de autenticação
 def create_access_token(data: dict):
@@ -65,6 +232,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(
         raise HTTPException(status_code=401, detail="Token inválido")
 
 # Validações manuais
+@medir("validate")
 def validate_email(email):
     if not email:
         raise HTTPException(status_code=400, detail="Email é obrigatório")
@@ -74,6 +242,7 @@ def validate_email(email):
         raise HTTPException(status_code=400, detail="Formato de email inválido")
     return email.lower()
 
+@medir("validate")
 def validate_nome(nome):
     if not nome or len(nome.strip()) < 2:
         raise HTTPException(status_code=400, detail="Nome deve ter pelo menos 2 caracteres")
@@ -83,6 +252,7 @@ def validate_nome(nome):
         raise HTTPException(status_code=400, detail="Nome deve conter apenas letras e espaços")
     return nome.strip().title()
 
+@medir("validate")
 def validate_telefone(telefone):
     if not telefone:
         raise HTTPException(status_code=400, detail="Telefone é obrigatório")
@@ -96,17 +266,20 @@ def validate_telefone(telefone):
     else:
         return f"({phone[:2]}) {phone[2:7]}-{phone[7:]}"
 
+@medir("validate")
 def validate_numero_quarto(numero):
     if not numero or len(numero.strip()) < 1:
         raise HTTPException(status_code=400, detail="Número do quarto é obrigatório")
     return numero.strip()
 
+@medir("validate")
 def validate_tipo_quarto(tipo):
     tipos_validos = ['Solteiro', 'Casal', 'Luxo', 'Suíte', 'Família']
     if tipo not in tipos_validos:
         raise HTTPException(status_code=400, detail=f"Tipo deve ser um dos: {', '.join(tipos_validos)}")
     return tipo
 
+@medir("validate")
 def validate_preco(preco):
     if not preco:
         raise HTTPException(status_code=400, detail="Preço é obrigatório")
@@ -120,6 +293,7 @@ def validate_preco(preco):
     except ValueError:
         raise HTTPException(status_code=400, detail="Preço deve ser um número válido")
 
+@medir("validate")
 def validate_date(date_str):
     if not date_str:
         raise HTTPException(status_code=400, detail="Data é obrigatória")
@@ -130,11 +304,213 @@ def validate_date(date_str):
     except ValueError:
         raise HTTPException(status_code=400, detail="Data deve estar no formato YYYY-MM-DD")
 
+# Disponibilidade de quartos
+def reserva_ativa(reserva, agora=None):
+    """Indica se a reserva ocupa o quarto (bloqueios vencidos não contam)."""
+    if reserva["status"] == "Cancelada":
+        return False
+    if reserva["status"] == "Pendente" and reserva.get("expira_em"):
+        agora = agora or datetime.now()
+        return datetime.fromisoformat(reserva["expira_em"]) > agora
+    return True
+
+@medir("conflict")
+def quarto_disponivel(data, quarto_numero, check_in, check_out, ignorar_id=None):
+    agora = datetime.now()
+    for r in data["reservas"]:
+        if (r["id"] != ignorar_id and
+            r["quarto_numero"] == quarto_numero and
+            r["data_check_in"] < check_out and
+            r["data_check_out"] > check_in and
+            reserva_ativa(r, agora)):
+            return False
+    return True
+
+# ==================== BLOQUEIOS TEMPORÁRIOS ====================
+# Heap de (expira_em, reserva_id): a varredura só olha o topo, sem percorrer
+# todas as reservas. Entradas de bloqueios já confirmados ou liberados são
+# descartadas quando chegam ao topo.
+bloqueios_heap = []
+bloqueios_lock = threading.Lock()
+
+def registrar_bloqueio(reserva):
+    with bloqueios_lock:
+        heapq.heappush(bloqueios_heap, (datetime.fromisoformat(reserva["expira_em"]), reserva["id"]))
+
+def carregar_bloqueios():
+    data = load_data()
+    with bloqueios_lock:
+        bloqueios_heap.clear()
+        for r in data["reservas"]:
+            if r["status"] == "Pendente" and r.get("expira_em"):
+                bloqueios_heap.append((datetime.fromisoformat(r["expira_em"]), r["id"]))
+        heapq.heapify(bloqueios_heap)
+
+def expirar_bloqueios():
+    agora = datetime.now()
+    vencidos = set()
+    with bloqueios_lock:
+        while bloqueios_heap and bloqueios_heap[0][0] <= agora:
+            vencidos.add(heapq.heappop(bloqueios_heap)[1])
+    
+    # A trava de escrita (entre workers) só é tomada quando há o que expirar
+    if not vencidos:
+        return 0
+    
+    with transacao():
+        data = load_data()
+        expirados = []
+        for r in data["reservas"]:
+            if r["id"] in vencidos and r["status"] == "Pendente" and not reserva_ativa(r, agora):
+                r["status"] = "Cancelada"
+                r["cancelled_at"] = agora.isoformat()
+                r["motivo_cancelamento"] = "Bloqueio expirado"
+                r.pop("expira_em", None)
+                expirados.append(r)
+        
+        if expirados:
+            save_data(data)
+    return len(expirados)
+
+async def varrer_bloqueios():
+    while True:
+        with bloqueios_lock:
+            proximo = bloqueios_heap[0][0] if bloqueios_heap else None
+        
+        espera = INTERVALO_VARREDURA
+        if proximo is not None:
+            espera = min(max((proximo - datetime.now()).total_seconds(), 0), INTERVALO_VARREDURA)
+        await asyncio.sleep(espera)
+        
+        try:
+            await asyncio.to_thread(expirar_bloqueios)
+        except Exception as e:
+            print(f"⚠️ Erro ao expirar bloqueios: {e}")
+
+# ==================== TAREFAS AGENDADAS ====================
+agendador = Agendador(AGENDADOR_LOCK_FILE)
+
+def localizar_reservas(data, ids):
+    ids = set(ids)
+    return [r for r in data["reservas"] if r["id"] in ids] if ids else []
+
+# Antes do encerramento, para que a estadia ainda esteja "Confirmada". O
+# sistema não registra check-in, então a pendência não indica no-show: o
+# hóspede pode estar hospedado e pagar na saída
+@agendador.diaria("marcar_nao_pagos", HORARIO_ENCERRAMENTO_ESTADIAS)
+@transacao()
+def marcar_nao_pagos():
+    """Sinaliza reservas ainda não pagas cujo check-in já passou."""
+    sincronizar_indices()
+    hoje = datetime.now().date().isoformat()
+    with indices_lock:
+        ids = agenda_reservas.retirar_check_ins_antes_de(hoje)
+    
+    data = load_data()
+    agora = datetime.now().isoformat()
+    alteradas = []
+    for r in localizar_reservas(data, ids):
+        if r["status"] == "Confirmada" and not r["pago"] and not r.get("nao_pago_apos_check_in"):
+            r["nao_pago_apos_check_in"] = True
+            r["nao_pago_apos_check_in_at"] = agora
+            alteradas.append(r)
+    
+    if alteradas:
+        save_data(data)
+    return {"nao_pagos": len(alteradas)}
+
+@agendador.diaria("encerrar_estadias", HORARIO_ENCERRAMENTO_ESTADIAS)
+@transacao()
+def encerrar_estadias():
+    """Marca como concluídas as estadias com check-out já passado.
+
+    Estadias sinalizadas como não pagas ficam pendentes para a recepção; ao
+    registrar o pagamento, a reserva volta à agenda e é concluída na próxima execução.
+    """
+    sincronizar_indices()
+    hoje = datetime.now().date().isoformat()
+    with indices_lock:
+        ids = agenda_reservas.retirar_check_outs_antes_de(hoje)
+    
+    data = load_data()
+    agora = datetime.now().isoformat()
+    alteradas = []
+    for r in localizar_reservas(data, ids):
+        if r["status"] == "Confirmada" and not r.get("nao_pago_apos_check_in"):
+            r["status"] = "Concluída"
+            r["concluded_at"] = agora
+            alteradas.append(r)
+    
+    if alteradas:
+        save_data(data)
+    return {"concluidas": len(alteradas)}
+
+@agendador.diaria("movimento_dia_seguinte", HORARIO_RELATORIOS)
+@transacao()
+def gerar_movimento_dia_seguinte():
+    """Pré-calcula as chegadas e saídas de amanhã."""
+    sincronizar_indices()
+    amanha = (datetime.now().date() + timedelta(days=1)).isoformat()
+    with indices_lock:
+        chegadas = [indice_reservas.documentos.get(i) for i in agenda_reservas.chegadas(amanha)]
+        saidas = [indice_reservas.documentos.get(i) for i in agenda_reservas.saidas(amanha)]
+    
+    def resumo(reservas):
+        return [
+            {
+                "id": r["id"],
+                "cliente_nome": r["cliente_nome"],
+                "quarto_numero": r["quarto_numero"],
+                "pago": r["pago"]
+            }
+            for r in reservas if r and r["status"] == "Confirmada"
+        ]
+    
+    data = load_data()
+    data.setdefault("relatorios", {})["movimento"] = {
+        "data": amanha,
+        "chegadas": resumo(chegadas),
+        "saidas": resumo(saidas),
+        "gerado_em": datetime.now().isoformat()
+    }
+    save_data(data)
+    return {"chegadas": len(data["relatorios"]["movimento"]["chegadas"]), "saidas": len(data["relatorios"]["movimento"]["saidas"])}
+
+@agendador.diaria("estatisticas", HORARIO_RELATORIOS)
+@transacao()
+def gerar_snapshot_estatisticas():
+    """Guarda uma cópia das estatísticas do dashboard."""
+    data = load_data()
+    data.setdefault("relatorios", {})["estatisticas"] = {
+        **calcular_estatisticas(data),
+        "gerado_em": datetime.now().isoformat()
+    }
+    save_data(data)
+    return {"gerado_em": data["relatorios"]["estatisticas"]["gerado_em"]}
+
+@asynccontextmanager
+async def lifespan(app):
+    carregar_bloqueios()
+    sincronizar_indices()
+    varredura = asyncio.create_task(varrer_bloqueios())
+    tarefas = asyncio.create_task(agendador.executar())
+    # Apenas o worker líder tira snapshots, em uma thread separada
+    backups.iniciar(INTERVALO_BACKUP, deve_executar=agendador.lider)
+    yield
+    # Encerramento: gravar um último snapshot enquanto ainda é o líder
+    await asyncio.to_thread(backups.parar)
+    if agendador.lider():
+        await asyncio.to_thread(backups.snapshot)
+    varredura.cancel()
+    tarefas.cancel()
+    await asyncio.gather(varredura, tarefas, return_exceptions=True)
+
 # FastAPI app
 app = FastAPI(
     title="Infinity Hotel Management API",
     description="Sistema de gerenciamento do Infinity Hotel com acesso para clientes e administradores",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -146,6 +522,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Rastreamento: tempo por fase de cada requisição e log das mais lentas
+requisicoes_lentas = deque(maxlen=100)
+if RASTREAMENTO_ATIVO:
+    app.router.route_class = RotaRastreada
+    app.add_middleware(MiddlewareRastreamento, limite_ms=LIMITE_REQUISICAO_LENTA_MS, lentas=requisicoes_lentas)
+
 # Rotas de teste
 @app.get("/")
 def read_root():
@@ -214,23 +596,12 @@ def get_quartos_disponiveis_periodo(check_in: str, check_out: str):
     quartos_em_servico = [q for q in data["quartos"] if q["status"]]
     
     # Verificar conflitos
-    quartos_disponiveis = []
-    for quarto in quartos_em_servico:
-        conflito = False
-        for reserva in data["reservas"]:
-            if (reserva["quarto_numero"] == quarto["numero"] and
-                reserva["status"] != "Cancelada" and
-                reserva["data_check_in"] < check_out and
-                reserva["data_check_out"] > check_in):
-                conflito = True
-                break
-        
-        if not conflito:
-            quartos_disponiveis.append(quarto)
+    quartos_disponiveis = [q for q in quartos_em_servico if quarto_disponivel(data, q["numero"], check_in, check_out)]
     
     return quartos_disponiveis
 
 @app.post("/api/public/cliente/cadastrar")
+@transacao()
 def cadastrar_cliente_public(cliente: dict):
     data = load_data()
     
@@ -246,7 +617,7 @@ def cadastrar_cliente_public(cliente: dict):
     
     # Criar novo cliente
     novo_cliente = {
-        "id": str(len(data["clientes"]) + 1),
+        "id": proximo_id(data["clientes"]),
         "nome": nome,
         "email": email,
         "telefone": telefone,
@@ -259,10 +630,7 @@ def cadastrar_cliente_public(cliente: dict):
     
     return {"message": "Cliente cadastrado com sucesso!", "cliente": novo_cliente}
 
-@app.post("/api/public/reserva/criar")
-def criar_reserva_public(reserva: dict):
-    data = load_data()
-    
+def validar_reserva_publica(data, reserva):
     # Validações manuais
     cliente_email = validate_email(reserva.get("cliente_email", ""))
     quarto_numero = reserva.get("quarto_numero", "")
@@ -288,19 +656,23 @@ def criar_reserva_public(reserva: dict):
     if not quarto["status"]:
         raise HTTPException(status_code=400, detail="Quarto fora de serviço")
     
-    # Verificar disponibilidade do quarto
-    for r in data["reservas"]:
-        if (r["quarto_numero"] == quarto_numero and 
-            r["status"] != "Cancelada" and
-            r["data_check_in"] < data_check_out and
-            r["data_check_out"] > data_check_in):
-            raise HTTPException(status_code=400, detail="Quarto não disponível para as datas selecionadas")
+    # Verificar disponibilidade do quarto (bloqueios em andamento também contam)
+    if not quarto_disponivel(data, quarto_numero, data_check_in, data_check_out):
+        raise HTTPException(status_code=400, detail="Quarto não disponível para as datas selecionadas")
+    
+    return cliente, quarto, data_check_in, data_check_out
+
+@app.post("/api/public/reserva/criar")
+@transacao()
+def criar_reserva_public(reserva: dict):
+    data = load_data()
+    cliente, quarto, data_check_in, data_check_out = validar_reserva_publica(data, reserva)
     
     # Criar nova reserva
     nova_reserva = {
-        "id": str(len(data["reservas"]) + 1),
+        "id": proximo_id(data["reservas"]),
         "cliente_id": cliente["id"],
-        "quarto_numero": quarto_numero,
+        "quarto_numero": quarto["numero"],
         "data_check_in": data_check_in,
         "data_check_out": data_check_out,
         "status": "Confirmada",
@@ -316,6 +688,83 @@ def criar_reserva_public(reserva: dict):
     
     return {"message": "Reserva criada com sucesso!", "reserva": nova_reserva}
 
+@app.post("/api/public/reserva/bloquear")
+@transacao()
+def bloquear_reserva_public(reserva: dict):
+    data = load_data()
+    cliente, quarto, data_check_in, data_check_out = validar_reserva_publica(data, reserva)
+    
+    # Criar bloqueio temporário enquanto o cliente conclui o pagamento
+    agora = datetime.now()
+    novo_bloqueio = {
+        "id": proximo_id(data["reservas"]),
+        "cliente_id": cliente["id"],
+        "quarto_numero": quarto["numero"],
+        "data_check_in": data_check_in,
+        "data_check_out": data_check_out,
+        "status": "Pendente",
+        "pago": False,
+        "created_at": agora.isoformat(),
+        "expira_em": (agora + timedelta(minutes=BLOQUEIO_MINUTOS)).isoformat(),
+        "cliente_nome": cliente["nome"],
+        "quarto_tipo": quarto["tipo"],
+        "origem": "cliente"
+    }
+    
+    data["reservas"].append(novo_bloqueio)
+    save_data(data)
+    registrar_bloqueio(novo_bloqueio)
+    
+    return {"message": f"Quarto reservado por {BLOQUEIO_MINUTOS} minutos. Conclua o pagamento para confirmar.", "reserva": novo_bloqueio}
+
+def encontrar_bloqueio(data, reserva_id, reserva):
+    cliente_email = validate_email(reserva.get("cliente_email", ""))
+    
+    bloqueio = next((r for r in data["reservas"] if r["id"] == reserva_id), None)
+    if not bloqueio:
+        raise HTTPException(status_code=404, detail="Reserva não encontrada")
+    
+    # Apenas o próprio cliente pode confirmar ou liberar o bloqueio
+    cliente = next((c for c in data["clientes"] if c["id"] == bloqueio["cliente_id"]), None)
+    if not cliente or cliente["email"].lower() != cliente_email.lower():
+        raise HTTPException(status_code=404, detail="Reserva não encontrada")
+    
+    if bloqueio["status"] != "Pendente":
+        raise HTTPException(status_code=400, detail="Reserva não está aguardando pagamento")
+    if not reserva_ativa(bloqueio):
+        raise HTTPException(status_code=400, detail="Bloqueio expirado. Faça uma nova reserva.")
+    
+    return bloqueio
+
+@app.post("/api/public/reserva/{reserva_id}/confirmar")
+@transacao()
+def confirmar_reserva_public(reserva_id: str, reserva: dict):
+    data = load_data()
+    bloqueio = encontrar_bloqueio(data, reserva_id, reserva)
+    
+    # Confirmar reserva; o pagamento é registrado pelo administrador
+    bloqueio["status"] = "Confirmada"
+    bloqueio["confirmed_at"] = datetime.now().isoformat()
+    bloqueio.pop("expira_em", None)
+    save_data(data)
+    
+    return {"message": "Reserva confirmada com sucesso!", "reserva": bloqueio}
+
+@app.post("/api/public/reserva/{reserva_id}/liberar")
+@transacao()
+def liberar_reserva_public(reserva_id: str, reserva: dict):
+    data = load_data()
+    bloqueio = encontrar_bloqueio(data, reserva_id, reserva)
+    
+    # Liberar o quarto antes da expiração
+    bloqueio["status"] = "Cancelada"
+    bloqueio["cancelled_at"] = datetime.now().isoformat()
+    bloqueio["motivo_cancelamento"] = "Bloqueio liberado pelo cliente"
+    bloqueio.pop("expira_em", None)
+    save_data(data)
+    
+    return {"message": "Quarto liberado com sucesso"}
+
 @app.get("/api/public/cliente/reservas/{email}")
 def get_reservas_cliente(email: str):
     data = load_data()
@@ -347,14 +796,11 @@ def get_reservas_cliente(email: str):
 
 # ==================== ROTAS ADMINISTRATIVAS ====================
 
-@app.get("/api/admin/dashboard/stats")
-def get_admin_dashboard_stats(current_user: str = Depends(verify_token)):
-    data = load_data()
-    
+def calcular_estatisticas(data):
     total_quartos = len(data["quartos"])
     quartos_disponiveis = len([q for q in data["quartos"] if q["status"]])
     total_clientes = len(data["clientes"])
-    reservas_ativas = len([r for r in data["reservas"] if r["status"] != "Cancelada"])
+    reservas_ativas = len([r for r in data["reservas"] if r["status"] not in STATUS_ENCERRADOS])
     total_reservas = len(data["reservas"])
     reservas_pagas = len([r for r in data["reservas"] if r["pago"]])
     reservas_pendentes = len([r for r in data["reservas"] if not r["pago"] and r["status"] != "Cancelada"])
@@ -374,12 +820,61 @@ def get_admin_dashboard_stats(current_user: str = Depends(verify_token)):
         "ocupacao": ocupacao
     }
 
+@app.get("/api/admin/dashboard/stats")
+def get_admin_dashboard_stats(current_user: str = Depends(verify_token)):
+    data = load_data()
+    return calcular_estatisticas(data)
+
+@app.get("/api/admin/relatorios")
+def get_admin_relatorios(current_user: str = Depends(verify_token)):
+    data = load_data()
+    return data.get("relatorios", {})
+
+@app.get("/api/admin/rastreamento")
+def get_admin_rastreamento(current_user: str = Depends(verify_token)):
+    return {
+        "ativo": RASTREAMENTO_ATIVO,
+        "limite_ms": LIMITE_REQUISICAO_LENTA_MS,
+        "lentas": list(reversed(requisicoes_lentas))
+    }
+
+@app.get("/api/admin/profiler", response_class=PlainTextResponse)
+async def get_admin_profiler(segundos: float = 5, current_user: str = Depends(verify_token)):
+    if segundos <= 0 or segundos > PROFILER_MAX_SEGUNDOS:
+        raise HTTPException(status_code=400, detail=f"Duração deve estar entre 0 e {PROFILER_MAX_SEGUNDOS} segundos")
+    return await asyncio.to_thread(amostrar_pilhas, segundos)
+
+@app.get("/api/admin/tarefas")
+def get_admin_tarefas(current_user: str = Depends(verify_token)):
+    return {
+        "lider": agendador.lider(),
+        "tarefas": [
+            {
+                "nome": nome,
+                "horario": horario.strftime("%H:%M"),
+                "ultima_execucao": agendador.ultimas_execucoes.get(nome)
+            }
+            for nome, (horario, _) in agendador.tarefas.items()
+        ]
+    }
+
+@app.post("/api/admin/tarefas/{nome}/executar")
+async def executar_admin_tarefa(nome: str, current_user: str = Depends(verify_token)):
+    if nome not in agendador.tarefas:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return await agendador.executar_tarefa(nome)
+
 @app.get("/api/admin/clientes")
 def get_admin_clientes(current_user: str = Depends(verify_token)):
     data = load_data()
     return data.get("clientes", [])
 
+@app.get("/api/admin/clientes/busca")
+def buscar_admin_clientes(q: str = "", pagina: int = 1, por_pagina: int = BUSCA_POR_PAGINA, current_user: str = Depends(verify_token)):
+    return paginar(indice_clientes, q, pagina, por_pagina)
+
 @app.post("/api/admin/clientes")
+@transacao()
 def create_admin_cliente(cliente: dict, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -395,7 +890,7 @@ def create_admin_cliente(cliente: dict, current_user: str = Depends(verify_token
     
     # Criar novo cliente
     novo_cliente = {
-        "id": str(len(data["clientes"]) + 1),
+        "id": proximo_id(data["clientes"]),
         "nome": nome,
         "email": email,
         "telefone": telefone,
@@ -409,6 +904,7 @@ def create_admin_cliente(cliente: dict, current_user: str = Depends(verify_token
     return novo_cliente
 
 @app.put("/api/admin/clientes/{cliente_id}")
+@transacao()
 def update_admin_cliente(cliente_id: str, cliente: dict, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -439,15 +935,21 @@ def update_admin_cliente(cliente_id: str, cliente: dict, current_user: str = Dep
         "telefone": telefone
     })
     
+    # Manter o nome copiado nas reservas do cliente
+    for r in data["reservas"]:
+        if r["cliente_id"] == cliente_id:
+            r["cliente_nome"] = nome
+    
     save_data(data)
     return data["clientes"][cliente_index]
 
 @app.delete("/api/admin/clientes/{cliente_id}")
+@transacao()
 def delete_admin_cliente(cliente_id: str, current_user: str = Depends(verify_token)):
     data = load_data()
     
     # Verificar se há reservas ativas
-    reservas_ativas = [r for r in data["reservas"] if r["cliente_id"] == cliente_id and r["status"] != "Cancelada"]
+    reservas_ativas = [r for r in data["reservas"] if r["cliente_id"] == cliente_id and r["status"] not in STATUS_ENCERRADOS]
     if reservas_ativas:
         raise HTTPException(status_code=400, detail="Não é possível excluir cliente com reservas ativas")
     
@@ -463,6 +965,7 @@ def get_admin_quartos(current_user: str = Depends(verify_token)):
     return data.get("quartos", [])
 
 @app.post("/api/admin/quartos")
+@transacao()
 def create_admin_quarto(quarto: dict, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -492,6 +995,7 @@ def create_admin_quarto(quarto: dict, current_user: str = Depends(verify_token))
     return novo_quarto
 
 @app.put("/api/admin/quartos/{numero}")
+@transacao()
 def update_admin_quarto(numero: str, quarto: dict, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -511,6 +1015,11 @@ def update_admin_quarto(numero: str, quarto: dict, current_user: str = Depends(v
     if quarto_index is None:
         raise HTTPException(status_code=404, detail="Quarto não encontrado")
     
+    # Verificar se o novo número já existe (exceto para o próprio quarto)
+    for q in data["quartos"]:
+        if q["numero"] == novo_numero and q["numero"] != numero:
+            raise HTTPException(status_code=400, detail="Número do quarto já existe")
+    
     # Atualizar quarto
     data["quartos"][quarto_index].update({
         "numero": novo_numero,
@@ -523,11 +1032,12 @@ def update_admin_quarto(numero: str, quarto: dict, current_user: str = Depends(v
     return data["quartos"][quarto_index]
 
 @app.delete("/api/admin/quartos/{numero}")
+@transacao()
 def delete_admin_quarto(numero: str, current_user: str = Depends(verify_token)):
     data = load_data()
     
     # Verificar se há reservas ativas
-    reservas_ativas = [r for r in data["reservas"] if r["quarto_numero"] == numero and r["status"] != "Cancelada"]
+    reservas_ativas = [r for r in data["reservas"] if r["quarto_numero"] == numero and r["status"] not in STATUS_ENCERRADOS]
     if reservas_ativas:
         raise HTTPException(status_code=400, detail="Não é possível excluir quarto com reservas ativas")
     
@@ -542,27 +1052,35 @@ def get_admin_reservas(current_user: str = Depends(verify_token)):
     data = load_data()
     reservas_enriched = []
     
-    for reserva in data["reservas"]:
-        # Encontrar cliente
-        cliente = next((c for c in data["clientes"] if c["id"] == reserva["cliente_id"]), None)
-        cliente_nome = cliente["nome"] if cliente else "Cliente não encontrado"
-        
-        # Encontrar quarto
-        quarto = next((q for q in data["quartos"] if q["numero"] == reserva["quarto_numero"]), None)
-        quarto_tipo = quarto["tipo"] if quarto else "Quarto não encontrado"
-        quarto_preco = quarto["preco"] if quarto else "0.00"
-        
-        reserva_enriched = {
-            **reserva,
-            "cliente_nome": cliente_nome,
-            "quarto_tipo": quarto_tipo,
-            "quarto_preco": quarto_preco
-        }
-        reservas_enriched.append(reserva_enriched)
+    # Juntar cada reserva com seu cliente e quarto
+    with span("join"):
+        for reserva in data["reservas"]:
+            # Encontrar cliente
+            cliente = next((c for c in data["clientes"] if c["id"] == reserva["cliente_id"]), None)
+            cliente_nome = cliente["nome"] if cliente else "Cliente não encontrado"
+            
+            # Encontrar quarto
+            quarto = next((q for q in data["quartos"] if q["numero"] == reserva["quarto_numero"]), None)
+            quarto_tipo = quarto["tipo"] if quarto else "Quarto não encontrado"
+            quarto_preco = quarto["preco"] if quarto else "0.00"
+            
+            reserva_enriched = {
+                **reserva,
+                "cliente_nome": cliente_nome,
+                "quarto_tipo": quarto_tipo,
+                "quarto_preco": quarto_preco
+            }
+            reservas_enriched.append(reserva_enriched)
     
     return reservas_enriched
 
+@app.get("/api/admin/reservas/busca")
+def buscar_admin_reservas(q: str = "", status: Optional[str] = None, pagina: int = 1, por_pagina: int = BUSCA_POR_PAGINA, current_user: str = Depends(verify_token)):
+    exatos = [termo_exato("status", status)] if status else []
+    return paginar(indice_reservas, q, pagina, por_pagina, exatos)
+
 @app.post("/api/admin/reservas")
+@transacao()
 def create_admin_reserva(reserva: dict, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -594,16 +1112,12 @@ def create_admin_reserva(reserva: dict, current_user: str = Depends(verify_token
         raise HTTPException(status_code=400, detail="Quarto fora de serviço")
     
     # Verificar disponibilidade do quarto
-    for r in data["reservas"]:
-        if (r["quarto_numero"] == quarto_numero and 
-            r["status"] != "Cancelada" and
-            r["data_check_in"] < data_check_out and
-            r["data_check_out"] > data_check_in):
-            raise HTTPException(status_code=400, detail="Quarto não disponível para as datas selecionadas")
+    if not quarto_disponivel(data, quarto_numero, data_check_in, data_check_out):
+        raise HTTPException(status_code=400, detail="Quarto não disponível para as datas selecionadas")
     
     # Criar nova reserva
     nova_reserva = {
-        "id": str(len(data["reservas"]) + 1),
+        "id": proximo_id(data["reservas"]),
         "cliente_id": cliente_id,
         "quarto_numero": quarto_numero,
         "data_check_in": data_check_in,
@@ -622,6 +1136,7 @@ def create_admin_reserva(reserva: dict, current_user: str = Depends(verify_token
     return {"message": "Reserva criada com sucesso!", "reserva": nova_reserva}
 
 @app.put("/api/admin/reservas/{reserva_id}/cancelar")
+@transacao()
 def cancel_admin_reserva(reserva_id: str, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -638,6 +1153,8 @@ def cancel_admin_reserva(reserva_id: str, current_user: str = Depends(verify_tok
     # Verificar se já está cancelada
     if data["reservas"][reserva_index]["status"] == "Cancelada":
         raise HTTPException(status_code=400, detail="Reserva já está cancelada")
+    if data["reservas"][reserva_index]["status"] == "Concluída":
+        raise HTTPException(status_code=400, detail="Não é possível cancelar estadia já concluída")
     
     # Cancelar reserva
     data["reservas"][reserva_index]["status"] = "Cancelada"
@@ -647,6 +1164,7 @@ def cancel_admin_reserva(reserva_id: str, current_user: str = Depends(verify_tok
     return {"message": "Reserva cancelada com sucesso"}
 
 @app.put("/api/admin/reservas/{reserva_id}/pagamento")
+@transacao()
 def toggle_admin_payment(reserva_id: str, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -665,13 +1183,24 @@ def toggle_admin_payment(reserva_id: str, current_user: str = Depends(verify_tok
     # Verificar se pode alterar pagamento
     if reserva["status"] == "Cancelada" and not reserva["pago"]:
         raise HTTPException(status_code=400, detail="Não é possível marcar reserva cancelada como paga")
-    
+
+    # Um bloqueio vencido ainda não varrido pode já ter o quarto reservado por outro
+    if reserva["status"] == "Pendente" and not reserva["pago"] and not reserva_ativa(reserva):
+        raise HTTPException(status_code=400, detail="Bloqueio expirado. Faça uma nova reserva.")
+
     # Alternar status de pagamento
     novo_status_pago = not reserva["pago"]
     data["reservas"][reserva_index]["pago"] = novo_status_pago
     
     if novo_status_pago:
         data["reservas"][reserva_index]["paid_at"] = datetime.now().isoformat()
+        data["reservas"][reserva_index].pop("nao_pago_apos_check_in", None)
+        data["reservas"][reserva_index].pop("nao_pago_apos_check_in_at", None)
+        
+        # Pagamento recebido confirma um bloqueio ainda pendente
+        if reserva["status"] == "Pendente":
+            data["reservas"][reserva_index]["status"] = "Confirmada"
+            data["reservas"][reserva_index].pop("expira_em", None)
     else:
         data["reservas"][reserva_index].pop("paid_at", None)
     
@@ -680,6 +1209,7 @@ def toggle_admin_payment(reserva_id: str, current_user: str = Depends(verify_tok
     return {"message": f"Reserva marcada como {'paga' if novo_status_pago else 'não paga'}"}
 
 @app.delete("/api/admin/reservas/{reserva_id}")
+@transacao()
 def delete_admin_reserva(reserva_id: str, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -705,6 +1235,7 @@ def delete_admin_reserva(reserva_id: str, current_user: str = Depends(verify_tok
     return {"message": "Reserva excluída permanentemente do sistema"}
 
 @app.put("/api/admin/reservas/{reserva_id}/reativar")
+@transacao()
 def reactivate_admin_reserva(reserva_id: str, current_user: str = Depends(verify_token)):
     data = load_data()
     
@@ -734,13 +1265,8 @@ def reactivate_admin_reserva(reserva_id: str, current_user: str = Depends(verify
     data_check_in = reserva["data_check_in"]
     data_check_out = reserva["data_check_out"]
     
-    for r in data["reservas"]:
-        if (r["id"] != reserva_id and 
-            r["quarto_numero"] == quarto_numero and 
-            r["status"] != "Cancelada" and
-            r["data_check_in"] < data_check_out and
-            r["data_check_out"] > data_check_in):
-            raise HTTPException(status_code=400, detail="Quarto não está mais disponível para as datas da reserva")
+    if not quarto_disponivel(data, quarto_numero, data_check_in, data_check_out, ignorar_id=reserva_id):
+        raise HTTPException(status_code=400, detail="Quarto não está mais disponível para as datas da reserva")
     
     # Reativar reserva
     data["reservas"][reserva_index]["status"] = "Confirmada"
@@ -756,6 +1282,7 @@ def get_admin_hotel_info(current_user: str = Depends(verify_token)):
     return data.get("hotelInfo", DEFAULT_DATA["hotelInfo"])
 
 @app.put("/api/admin/hotel-info")
+@transacao()
 def update_admin_hotel_info(info: dict, current_user: str = Depends(verify_token)):
     data = load_data()
     
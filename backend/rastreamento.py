@@ -0,0 +1,173 @@
+import asyncio
+import functools
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+
+# Trace da requisição atual; None quando o rastreamento está desligado
+_trace_atual = ContextVar("trace_atual", default=None)
+
+class Trace:
+    """Tempos por fase de uma requisição, somados por nome de span.
+
+    Cada fase conta só o próprio tempo: o de fases aninhadas (load dentro de
+    index, por exemplo) é descontado, então a soma das fases não passa do
+    total da requisição.
+    """
+
+    def __init__(self):
+        self.fases = {}    # nome -> [segundos, chamadas]
+        self.abertas = []  # tempo já atribuído às fases aninhadas de cada fase aberta
+
+    def registrar(self, nome, duracao):
+        fase = self.fases.setdefault(nome, [0.0, 0])
+        fase[0] += duracao
+        fase[1] += 1
+
+    @contextmanager
+    def fase(self, nome):
+        inicio = time.perf_counter()
+        self.abertas.append(0.0)
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.registrar(nome, duracao - self.abertas.pop())
+            if self.abertas:
+                self.abertas[-1] += duracao
+
+    def resumo(self):
+        return {
+            nome: {"ms": round(segundos * 1000, 3), "chamadas": chamadas}
+            for nome, (segundos, chamadas) in sorted(self.fases.items(), key=lambda f: -f[1][0])
+        }
+
+@contextmanager
+def span(nome):
+    """Mede o bloco como a fase `nome` da requisição atual (se rastreada)."""
+    trace = _trace_atual.get()
+    if trace is None:
+        yield
+        return
+    with trace.fase(nome):
+        yield
+
+def medir(nome):
+    """Decorador equivalente a `with span(nome)` em volta da função."""
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            trace = _trace_atual.get()
+            if trace is None:
+                return funcao(*args, **kwargs)
+            with trace.fase(nome):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorar
+
+class RotaRastreada(APIRoute):
+    """Rota que separa o tempo do handler do restante do trabalho do FastAPI.
+
+    "serialize" é o tempo da rota fora do handler e das demais fases: leitura
+    do corpo, dependências (como verify_token) e conversão da resposta para JSON.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def medido(*args, **kw):
+                with span("handler"):
+                    return await endpoint(*args, **kw)
+        else:
+            @functools.wraps(endpoint)
+            def medido(*args, **kw):
+                with span("handler"):
+                    return endpoint(*args, **kw)
+        super().__init__(path, medido, **kwargs)
+
+    def get_route_handler(self):
+        original = super().get_route_handler()
+
+        async def handler(request):
+            trace = _trace_atual.get()
+            if trace is None:
+                return await original(request)
+            # Dependências e handler rodam um após o outro, mesmo quando em
+            # threads, então as fases abertas formam uma pilha por requisição
+            with trace.fase("serialize"):
+                return await original(request)
+
+        return handler
+
+class MiddlewareRastreamento:
+    """Middleware ASGI que abre um Trace por requisição e registra as lentas."""
+
+    def __init__(self, app, limite_ms=200, lentas=None):
+        self.app = app
+        self.limite_ms = limite_ms
+        self.lentas = lentas if lentas is not None else deque(maxlen=100)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _trace_atual.set(trace)
+        status_code = None
+
+        async def enviar(mensagem):
+            nonlocal status_code
+            if mensagem["type"] == "http.response.start":
+                status_code = mensagem["status"]
+            await send(mensagem)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            total_ms = (time.perf_counter() - inicio) * 1000
+            _trace_atual.reset(token)
+            if total_ms >= self.limite_ms:
+                self.registrar_lenta(scope, status_code, total_ms, trace)
+
+    def registrar_lenta(self, scope, status_code, total_ms, trace):
+        fases = trace.resumo()
+        self.lentas.append({
+            "metodo": scope["method"],
+            "caminho": scope["path"],
+            "status": status_code,
+            "total_ms": round(total_ms, 3),
+            "fases": fases,
+            "registrado_em": datetime.now().isoformat()
+        })
+        detalhes = ", ".join(f"{nome} {f['ms']:.1f}ms" for nome, f in fases.items())
+        print(f"🐢 {scope['method']} {scope['path']} {total_ms:.1f}ms ({detalhes})")
+
+def amostrar_pilhas(segundos, intervalo=0.005):
+    """Profiler por amostragem de todas as threads, exceto a do próprio profiler.
+
+    Retorna as pilhas no formato "collapsed" (frame;frame;frame contagem),
+    aceito por ferramentas de flamegraph como speedscope e flamegraph.pl.
+    """
+    proprio = threading.get_ident()
+    contagens = Counter()
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == proprio:
+                continue
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(f"{codigo.co_name} ({codigo.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            contagens[";".join(reversed(pilha))] += 1
+        time.sleep(intervalo)
+    return "\n".join(f"{pilha} {n}" for pilha, n in contagens.most_common())
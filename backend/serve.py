@@ -0,0 +1,147 @@
+# Servidor de produção: carrega a aplicação uma vez e cria os workers com
+# fork, que compartilham dados e índices já montados por copy-on-write.
+# Uso (a partir do diretório backend): python serve.py --workers 4
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+
+import uvicorn
+
+def modulo_disponivel(nome):
+    try:
+        __import__(nome)
+        return True
+    except ImportError:
+        return False
+
+def criar_config(args, app):
+    return uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="uvloop" if modulo_disponivel("uvloop") else "asyncio",
+        http="httptools" if modulo_disponivel("httptools") else "h11",
+        lifespan="on",
+        access_log=args.access_log,
+        timeout_graceful_shutdown=args.timeout_encerramento,
+    )
+
+def executar_worker(config, socket):
+    # Cada worker instala seus próprios handlers de SIGTERM/SIGINT (uvicorn)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[socket])
+
+def iniciar_worker(config, socket):
+    # Sem isso, o que estiver no buffer seria impresso também pelo filho
+    sys.stdout.flush()
+    pid = os.fork()
+    if pid == 0:
+        codigo = 0
+        try:
+            executar_worker(config, socket)
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} encerrado com erro: {e}")
+            codigo = 1
+        finally:
+            os._exit(codigo)
+    return pid
+
+def executar_prefork(args):
+    # Pré-carregamento: importar a aplicação e montar os índices antes do fork
+    import main
+    main.sincronizar_indices()
+    main.carregar_bloqueios()
+
+    config = criar_config(args, main.app)
+    socket = config.bind_socket()
+
+    # Objetos já existentes não são mais visitados pelo GC, o que evita
+    # copiar as páginas compartilhadas para cada worker
+    gc.collect()
+    gc.freeze()
+
+    workers = {}
+    parando = False
+
+    def encerrar(signum, frame):
+        nonlocal parando
+        if parando:
+            return
+        parando = True
+        print(f"🛑 Encerrando {len(workers)} worker(s)...")
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # Workers que não terminarem a tempo são finalizados à força
+        signal.alarm(args.timeout_encerramento + 10)
+
+    def forcar_encerramento(signum, frame):
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, encerrar)
+    signal.signal(signal.SIGINT, encerrar)
+    signal.signal(signal.SIGALRM, forcar_encerramento)
+
+    for _ in range(args.workers):
+        workers[iniciar_worker(config, socket)] = time.monotonic()
+    print(f"🚀 {args.workers} worker(s) em http://{args.host}:{args.port} (loop={config.loop}, http={config.http})")
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        iniciado_em = workers.pop(pid, None)
+        if iniciado_em is None or parando:
+            continue
+
+        print(f"⚠️ Worker {pid} terminou inesperadamente; reiniciando")
+        # Evitar reinícios em sequência se o worker cair logo ao iniciar
+        if time.monotonic() - iniciado_em < 5:
+            time.sleep(1)
+        workers[iniciar_worker(config, socket)] = time.monotonic()
+
+    socket.close()
+    print("✅ Servidor encerrado")
+
+def executar():
+    parser = argparse.ArgumentParser(description="Servidor de produção do Infinity Hotel")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--timeout-encerramento", type=int, default=30, help="Segundos para concluir requisições ao encerrar")
+    parser.add_argument("--access-log", action="store_true", help="Registrar cada requisição no console")
+    args = parser.parse_args()
+
+    print("🏨 Iniciando Infinity Hotel Management API (produção)...")
+    # Sem fcntl (Windows) não há trava do arquivo de dados entre processos nem
+    # eleição do líder das tarefas: vários workers perderiam gravações
+    if args.workers > 1 and not modulo_disponivel("fcntl"):
+        print(f"⚠️ fcntl indisponível nesta plataforma; usando 1 worker em vez de {args.workers}")
+        args.workers = 1
+
+    if hasattr(os, "fork"):
+        executar_prefork(args)
+    else:
+        # Windows: sem fork, um único processo sem pré-carregamento
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            access_log=args.access_log,
+            timeout_graceful_shutdown=args.timeout_encerramento,
+        )
+
+if __name__ == "__main__":
+    sys.exit(executar())
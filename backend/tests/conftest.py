@@ -0,0 +1,65 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Os módulos da API (main, busca, backup...) ficam no diretório backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def data_iso(valor):
+    # Inteiros são dias a partir de hoje (-1 = ontem); textos já são datas ISO
+    if isinstance(valor, int):
+        return (datetime.now().date() + timedelta(days=valor)).isoformat()
+    return valor
+
+@pytest.fixture
+def nova_reserva():
+    """Fábrica de reservas confirmadas e não pagas de Ana Lima no quarto 101."""
+    def criar(reserva_id, check_in=1, check_out=None, **campos):
+        data_check_in = data_iso(check_in)
+        if check_out is None:
+            check_out = (datetime.fromisoformat(data_check_in) + timedelta(days=2)).date().isoformat()
+        reserva = {
+            "id": reserva_id,
+            "cliente_id": "1",
+            "cliente_nome": "Ana Lima",
+            "quarto_numero": "101",
+            "quarto_tipo": "Standard",
+            "data_check_in": data_check_in,
+            "data_check_out": data_iso(check_out),
+            "status": "Confirmada",
+            "pago": False
+        }
+        reserva.update(campos)
+        return reserva
+    return criar
+
+@pytest.fixture
+def hotel(tmp_path, monkeypatch):
+    """Aponta a API para um hotel_data.json em tmp_path.
+
+    Retorna uma função que grava os dados informados e monta os índices.
+    """
+    import main
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "indices_versao", None)
+    monkeypatch.setattr(main, "bloqueios_heap", [])
+
+    def gravar(reservas=(), clientes=None):
+        data = {
+            "clientes": clientes if clientes is not None else [
+                {"id": "1", "nome": "Ana Lima", "email": "ana@email.com", "telefone": "(31) 99999-8888"}
+            ],
+            "quartos": [
+                {"numero": "101", "tipo": "Standard", "preco": "200", "status": True},
+                {"numero": "102", "tipo": "Luxo", "preco": "350", "status": True}
+            ],
+            "reservas": list(reservas),
+            "hotelInfo": {"nome": "Infinity Hotel"}
+        }
+        main.save_data(data)
+        main.sincronizar_indices()
+        return data
+    return gravar
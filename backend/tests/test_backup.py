@@ -0,0 +1,58 @@
+import copy
+import json
+import os
+
+from backup import GerenciadorBackup, salvar_json_atomico
+
+def salvar_e_snapshot(gerenciador, caminho, data):
+    salvar_json_atomico(caminho, data)
+    assert gerenciador.snapshot() is not None
+    return gerenciador.listar()[-1]["criado_em"], copy.deepcopy(data)
+
+def test_restaurar_cadeia_com_ids_repetidos(tmp_path, nova_reserva):
+    caminho = str(tmp_path / "hotel_data.json")
+    gerenciador = GerenciadorBackup(caminho, str(tmp_path / "backups"))
+    data = {
+        "clientes": [],
+        "quartos": [{"numero": "101"}],
+        "reservas": [nova_reserva("1", "2026-10-18"), nova_reserva("2", "2026-10-19"), nova_reserva("3", "2026-10-20")],
+    }
+    estados = [salvar_e_snapshot(gerenciador, caminho, data)]
+
+    # Excluir a reserva "2" e criar outra com id "3" (ids gerados com len + 1)
+    data["reservas"] = [data["reservas"][0], data["reservas"][2], nova_reserva("3", "2026-10-25")]
+    estados.append(salvar_e_snapshot(gerenciador, caminho, data))
+
+    # Alterar apenas a segunda reserva "3"
+    data["reservas"][2]["status"] = "Cancelada"
+    estados.append(salvar_e_snapshot(gerenciador, caminho, data))
+
+    tipos = [s["tipo"] for s in gerenciador.listar()]
+    assert tipos == ["completo", "incremental", "incremental"]
+    for criado_em, esperado in estados:
+        assert gerenciador.restaurar(criado_em) == esperado
+    assert gerenciador.restaurar() == data
+
+def test_cadeia_continua_apos_reiniciar(tmp_path, nova_reserva):
+    caminho = str(tmp_path / "hotel_data.json")
+    diretorio = str(tmp_path / "backups")
+    data = {"clientes": [], "quartos": [], "reservas": [nova_reserva("1", "2026-10-18"), nova_reserva("1", "2026-10-19")]}
+    salvar_e_snapshot(GerenciadorBackup(caminho, diretorio), caminho, data)
+
+    data["reservas"][1]["status"] = "Cancelada"
+    gerenciador = GerenciadorBackup(caminho, diretorio)
+    salvar_e_snapshot(gerenciador, caminho, data)
+
+    assert [s["tipo"] for s in gerenciador.listar()] == ["completo", "incremental"]
+    assert gerenciador.restaurar() == data
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f) == data
+
+def test_salvar_json_atomico_mantem_permissoes(tmp_path):
+    caminho = str(tmp_path / "hotel_data.json")
+    salvar_json_atomico(caminho, {"clientes": []})
+    os.chmod(caminho, 0o640)
+
+    salvar_json_atomico(caminho, {"clientes": [{"id": "1"}]})
+
+    assert os.stat(caminho).st_mode & 0o777 == 0o640
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+def em_minutos(minutos):
+    return (datetime.now() + timedelta(minutes=minutos)).isoformat()
+
+def pedido(reserva, email="ana@email.com"):
+    return {
+        "cliente_email": email,
+        "quarto_numero": reserva["quarto_numero"],
+        "data_check_in": reserva["data_check_in"],
+        "data_check_out": reserva["data_check_out"]
+    }
+
+def por_id():
+    return {r["id"]: r for r in main.load_data()["reservas"]}
+
+@pytest.fixture
+def novo_bloqueio(nova_reserva):
+    def criar(reserva_id, expira_em_minutos, **campos):
+        return nova_reserva(reserva_id, 5, 8, status="Pendente", expira_em=em_minutos(expira_em_minutos), **campos)
+    return criar
+
+@pytest.mark.parametrize("rota", [main.criar_reserva_public, main.bloquear_reserva_public])
+def test_bloqueio_em_andamento_impede_nova_reserva(hotel, novo_bloqueio, rota):
+    bloqueio = novo_bloqueio("1", 10)
+    hotel([bloqueio])
+
+    with pytest.raises(HTTPException) as erro:
+        rota(pedido(bloqueio))
+    assert erro.value.status_code == 400
+    assert len(por_id()) == 1
+
+def test_bloqueio_vencido_nao_varrido_libera_o_quarto(hotel, novo_bloqueio):
+    bloqueio = novo_bloqueio("1", -1)
+    hotel([bloqueio])
+
+    resposta = main.bloquear_reserva_public(pedido(bloqueio))
+
+    assert resposta["reserva"]["id"] == "2"
+    assert por_id()["1"]["status"] == "Pendente"
+
+def test_expirar_bloqueios_cancela_apenas_os_vencidos(hotel, novo_bloqueio):
+    hotel([novo_bloqueio("1", -1), novo_bloqueio("2", 10, quarto_numero="102")])
+    main.carregar_bloqueios()
+
+    assert main.expirar_bloqueios() == 1
+
+    reservas = por_id()
+    assert reservas["1"]["status"] == "Cancelada"
+    assert reservas["1"]["motivo_cancelamento"] == "Bloqueio expirado"
+    assert "expira_em" not in reservas["1"]
+    assert reservas["2"]["status"] == "Pendente"
+    assert main.expirar_bloqueios() == 0
+
+@pytest.mark.parametrize("rota", [main.confirmar_reserva_public, main.liberar_reserva_public])
+def test_outro_email_nao_encontra_o_bloqueio(hotel, novo_bloqueio, rota):
+    bloqueio = novo_bloqueio("1", 10)
+    hotel([bloqueio], clientes=[
+        {"id": "1", "nome": "Ana Lima", "email": "ana@email.com", "telefone": ""},
+        {"id": "2", "nome": "Bruno Costa", "email": "bruno@email.com", "telefone": ""}
+    ])
+
+    with pytest.raises(HTTPException) as erro:
+        rota("1", pedido(bloqueio, email="bruno@email.com"))
+    assert erro.value.status_code == 404
+    assert por_id()["1"]["status"] == "Pendente"
+
+def test_confirmar_bloqueio_nao_registra_pagamento(hotel, novo_bloqueio):
+    bloqueio = novo_bloqueio("1", 10)
+    hotel([bloqueio])
+
+    main.confirmar_reserva_public("1", pedido(bloqueio))
+
+    reserva = por_id()["1"]
+    assert reserva["status"] == "Confirmada"
+    assert reserva["pago"] is False
+    assert "expira_em" not in reserva
+
+def test_pagamento_de_bloqueio_vencido_e_recusado(hotel, novo_bloqueio):
+    hotel([novo_bloqueio("1", -1)])
+
+    with pytest.raises(HTTPException) as erro:
+        main.toggle_admin_payment("1", current_user="admin")
+    assert erro.value.status_code == 400
+    assert por_id()["1"]["pago"] is False
+
+def test_varredura_sem_vencidos_nao_toma_a_trava_de_escrita(hotel, novo_bloqueio, monkeypatch):
+    hotel([novo_bloqueio("1", 10)])
+    main.carregar_bloqueios()
+
+    class FlockProibido:
+        LOCK_EX = 2
+
+        def flock(self, fd, operacao):
+            raise AssertionError("trava de escrita tomada sem bloqueios vencidos")
+    monkeypatch.setattr(main, "fcntl", FlockProibido())
+
+    assert main.expirar_bloqueios() == 0
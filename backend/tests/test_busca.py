@@ -0,0 +1,57 @@
+from busca import IndiceBusca, consulta_cliente, termo_exato, termos_cliente, termos_reserva
+
+def indice_clientes():
+    indice = IndiceBusca(termos_cliente, consulta_cliente)
+    indice.reconstruir([
+        {"id": "1", "nome": "Ana Souza", "email": "ana@email.com", "telefone": "(31) 99999-8888"},
+        {"id": "2", "nome": "Bruno 2", "email": "bruno@email.com", "telefone": "(11) 98888-7777"},
+    ])
+    return indice
+
+def test_busca_telefone_formatado():
+    indice = indice_clientes()
+    for consulta in ["(31) 99999-8888", "31 99999 8888", "99999-8888", "8888", "3199999"]:
+        assert [c["id"] for c in indice.buscar(consulta)] == ["1"], consulta
+
+def test_busca_texto_com_numero():
+    indice = indice_clientes()
+    assert [c["id"] for c in indice.buscar("bruno 2")] == ["2"]
+    assert [c["id"] for c in indice.buscar("souza ana")] == ["1"]
+
+def test_ids_repetidos_continuam_buscaveis(nova_reserva):
+    indice = IndiceBusca(termos_reserva)
+    ana = nova_reserva("3")
+    bruno = nova_reserva("3", cliente_nome="Bruno Costa")
+    indice.reconstruir([ana, bruno])
+
+    assert indice.buscar("") == [ana, bruno]
+    assert indice.buscar("ana") == [ana]
+    assert indice.buscar("bruno") == [bruno]
+
+    # Excluir a primeira: a segunda passa a ocupar a chave "3"
+    indice.sincronizar([bruno])
+    assert indice.buscar("") == [bruno]
+    assert indice.buscar("ana") == []
+
+def test_busca_paginada_em_ordem_de_id(nova_reserva):
+    indice = IndiceBusca(termos_reserva)
+    reservas = [nova_reserva(str(i), cliente_nome="Ana Lima" if i % 2 else "Bruno Costa") for i in range(1, 31)]
+    indice.reconstruir(reversed(reservas))
+
+    total, pagina = indice.buscar_pagina("", 10, 5)
+    assert total == 30
+    assert [r["id"] for r in pagina] == ["11", "12", "13", "14", "15"]
+
+    total, pagina = indice.buscar_pagina("ana", 5, 3)
+    assert total == 15
+    assert [r["id"] for r in pagina] == ["11", "13", "15"]
+
+    # Alterações incrementais mantêm a ordem
+    reservas[1]["status"] = "Cancelada"
+    indice.sincronizar(reservas[1:] + [nova_reserva("31")])
+    total, pagina = indice.buscar_pagina("", 0, 3)
+    assert total == 30
+    assert [r["id"] for r in pagina] == ["2", "3", "4"]
+
+    total, pagina = indice.buscar_pagina("bruno", 0, 5, [termo_exato("status", "Cancelada")])
+    assert (total, [r["id"] for r in pagina]) == (1, ["2"])
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import main
+
+@pytest.fixture
+def dados(hotel, nova_reserva):
+    return hotel([nova_reserva("1", "2030-01-01")])
+
+@pytest.fixture
+def reconstrucoes(dados, monkeypatch):
+    """Registra as reconstruções completas do índice de reservas feitas no teste."""
+    chamadas = []
+    original = main.indice_reservas.reconstruir
+    monkeypatch.setattr(main.indice_reservas, "reconstruir", lambda registros: chamadas.append(1) or original(registros))
+    return chamadas
+
+def test_gravacao_sem_dados_indexados_mantem_indices(dados, reconstrucoes):
+    dados["hotelInfo"]["telefone"] = "(31) 3333-4444"
+    main.save_data(dados)
+
+    assert main.indices_versao == main.versao_dados()
+    main.sincronizar_indices()
+    assert reconstrucoes == []
+
+def test_gravacao_de_outro_processo_aplicada_sem_reconstruir(dados, reconstrucoes):
+    dados["reservas"][0]["status"] = "Cancelada"
+    dados["clientes"].append({"id": "2", "nome": "Bruno Costa", "email": "bruno@email.com", "telefone": ""})
+    # Gravação direta no arquivo, como faria outro worker
+    with open(main.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+
+    main.sincronizar_indices()
+
+    assert reconstrucoes == []
+    assert [r["status"] for r in main.indice_reservas.buscar("ana")] == ["Cancelada"]
+    assert [c["id"] for c in main.indice_clientes.buscar("bruno")] == ["2"]
+
+def test_alteracao_no_mesmo_objeto_ja_gravado_e_reindexada(dados):
+    dados["reservas"][0]["pago"] = True
+    main.save_data(dados)
+    dados["reservas"][0]["cliente_nome"] = "Bruno Costa"
+    main.save_data(dados)
+
+    assert main.indices_versao == main.versao_dados()
+    assert [r["id"] for r in main.indice_reservas.buscar("bruno")] == ["1"]
+    assert main.indice_reservas.buscar("ana") == []
@@ -0,0 +1,34 @@
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture
+def cliente_rastreado(monkeypatch):
+    # O rastreamento é configurado ao importar main
+    with monkeypatch.context() as m:
+        m.setenv("HOTEL_RASTREAMENTO", "1")
+        m.setenv("HOTEL_LIMITE_LENTA_MS", "0")
+        importlib.reload(main)
+    yield TestClient(main.app)
+    importlib.reload(main)
+
+def test_fases_somam_no_maximo_o_total(cliente_rastreado, hotel):
+    hotel()
+    token = main.create_access_token(data={"sub": "admin"})
+
+    resposta = cliente_rastreado.post(
+        "/api/admin/clientes",
+        json={"nome": "Bruno Costa", "email": "bruno@email.com", "telefone": "(31) 98888-7777"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert resposta.status_code == 200
+    lenta = main.requisicoes_lentas[-1]
+    assert lenta["caminho"] == "/api/admin/clientes"
+    assert {"load", "validate", "persist", "index", "handler", "serialize"} <= set(lenta["fases"])
+    # Fases aninhadas (index dentro de save_data) não são contadas duas vezes
+    soma = sum(f["ms"] for f in lenta["fases"].values())
+    assert soma <= lenta["total_ms"] + 0.01
@@ -0,0 +1,35 @@
+import pytest
+
+import main
+
+@pytest.fixture
+def dados(hotel, nova_reserva):
+    return hotel([
+        nova_reserva("1", -3, -1, pago=True),
+        nova_reserva("2", -3, -1),
+        nova_reserva("3", -1, 1),
+    ])
+
+def por_id():
+    return {r["id"]: r for r in main.load_data()["reservas"]}
+
+def test_estadia_nao_paga_fica_pendente_ate_o_pagamento(dados):
+    assert main.marcar_nao_pagos() == {"nao_pagos": 2}
+    assert main.encerrar_estadias() == {"concluidas": 1}
+
+    reservas = por_id()
+    assert reservas["1"]["status"] == "Concluída"
+    assert reservas["2"]["status"] == "Confirmada"
+    assert reservas["2"]["nao_pago_apos_check_in"] is True
+    assert reservas["3"]["status"] == "Confirmada"
+
+    main.toggle_admin_payment("2", current_user="admin")
+    assert "nao_pago_apos_check_in" not in por_id()["2"]
+    assert main.encerrar_estadias() == {"concluidas": 1}
+    assert por_id()["2"]["status"] == "Concluída"
+
+def test_relatorios_mantem_indices_atualizados(dados):
+    main.gerar_movimento_dia_seguinte()
+    main.gerar_snapshot_estatisticas()
+
+    assert main.indices_versao == main.versao_dados()
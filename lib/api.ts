@@ -34,6 +34,12 @@ export interface Reserva {
   cancelled_at?: string
   paid_at?: string
   reactivated_at?: string
+  expira_em?: string
+  confirmed_at?: string
+  motivo_cancelamento?: string
+  concluded_at?: string
+  nao_pago_apos_check_in?: boolean
+  nao_pago_apos_check_in_at?: string
 }
 
 export interface HotelInfo {
@@ -53,6 +59,13 @@ export interface DashboardStats {
   ocupacao: number
 }
 
+export interface ResultadoBusca<T> {
+  total: number
+  pagina: number
+  por_pagina: number
+  resultados: T[]
+}
+
 // Classe para gerenciar a API
 class ApiClient {
   private token: string | null = null
@@ -187,6 +200,32 @@ class ApiClient {
     })
   }
 
+  async bloquearReservaPublic(reserva: {
+    cliente_email: string
+    quarto_numero: string
+    data_check_in: string
+    data_check_out: string
+  }): Promise<{ message: string; reserva: Reserva }> {
+    return this.request<{ message: string; reserva: Reserva }>("/public/reserva/bloquear", {
+      method: "POST",
+      body: JSON.stringify(reserva),
+    })
+  }
+
+  async confirmarReservaPublic(id: string, cliente_email: string): Promise<{ message: string; reserva: Reserva }> {
+    return this.request<{ message: string; reserva: Reserva }>(`/public/reserva/${id}/confirmar`, {
+      method: "POST",
+      body: JSON.stringify({ cliente_email }),
+    })
+  }
+
+  async liberarReservaPublic(id: string, cliente_email: string): Promise<{ message: string }> {
+    return this.request<{ message: string }>(`/public/reserva/${id}/liberar`, {
+      method: "POST",
+      body: JSON.stringify({ cliente_email }),
+    })
+  }
+
   async getReservasCliente(email: string): Promise<Reserva[]> {
     return this.request<Reserva[]>(`/public/cliente/reservas/${encodeURIComponent(email)}`)
   }
@@ -201,6 +240,11 @@ class ApiClient {
     return this.request<Cliente[]>("/admin/clientes")
   }
 
+  async buscarAdminClientes(q: string, pagina = 1, porPagina = 20): Promise<ResultadoBusca<Cliente>> {
+    const params = new URLSearchParams({ q, pagina: String(pagina), por_pagina: String(porPagina) })
+    return this.request<ResultadoBusca<Cliente>>(`/admin/clientes/busca?${params}`)
+  }
+
   async createAdminCliente(cliente: Omit<Cliente, "id" | "created_at">): Promise<Cliente> {
     return this.request<Cliente>("/admin/clientes", {
       method: "POST",
@@ -249,6 +293,19 @@ class ApiClient {
     return this.request<Reserva[]>("/admin/reservas")
   }
 
+  async buscarAdminReservas(
+    q: string,
+    pagina = 1,
+    porPagina = 20,
+    status?: string,
+  ): Promise<ResultadoBusca<Reserva>> {
+    const params = new URLSearchParams({ q, pagina: String(pagina), por_pagina: String(porPagina) })
+    if (status) {
+      params.set("status", status)
+    }
+    return this.request<ResultadoBusca<Reserva>>(`/admin/reservas/busca?${params}`)
+  }
+
   async createAdminReserva(reserva: {
     cliente_id: string
     quarto_numero: string